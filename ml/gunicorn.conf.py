@@ -0,0 +1,35 @@
+"""
+Gunicorn settings for the ML server (see wsgi.py).
+
+Workers are gthread processes: a few request threads per worker, so /health and
+overlapping /analyze calls are not serialized behind a running analysis (like
+the threaded Flask dev server this replaces), while the lock-guarded module
+caches stay shared within the worker. IsolationForest parallelizes across cores
+inside a worker, so the cores are split between workers via ML_N_JOBS rather
+than letting every worker claim all of them.
+
+The unchanged-snapshot response, PageRank vector and IsolationForest model
+caches live in each worker process. Node posts one snapshot every 10 seconds,
+so the default is a single worker that sees every snapshot and keeps those
+caches warm; raise ML_WORKERS only for several concurrent clients.
+"""
+
+import os
+
+bind = os.environ.get("ML_BIND", "0.0.0.0:5001")
+
+_cpus = os.cpu_count() or 1
+workers = int(os.environ.get("ML_WORKERS", 1))
+worker_class = "gthread"
+threads = int(os.environ.get("ML_THREADS", 4))
+timeout = 120
+
+# Import NetworkX / scikit-learn (and compile Numba kernels) once before forking
+preload_app = True
+
+raw_env = [f"ML_N_JOBS={os.environ.get('ML_N_JOBS', max(1, _cpus // workers))}"]
+
+
+def when_ready(server):
+    server.log.info("[ml] Python ML server listening on %s with %d workers x %d threads", bind, workers, threads)
+    server.log.info("[ml] Using NetworkX (Louvain, PageRank) + scikit-learn (IsolationForest)")
@@ -9,70 +9,240 @@ Receives: { nodes, edges }
 Returns:  { communities, pagerank, hubs, anomalies, evaluation }
 """
 
-from flask import Flask, request, jsonify
+import os
+import sys
+
+if __name__ == "__main__" and not os.environ.get("USE_DEV_SERVER"):
+    # Hand off to gunicorn (settings in gunicorn.conf.py) before the heavy imports
+    # below; gunicorn loads this module itself through wsgi.py
+    ml_dir = os.path.dirname(os.path.abspath(__file__))
+    os.execv(sys.executable, [
+        sys.executable, "-m", "gunicorn",
+        "--chdir", ml_dir,
+        "-c", os.path.join(ml_dir, "gunicorn.conf.py"),
+        "wsgi:app",
+    ])
+
+from flask import Flask, request
 from flask_cors import CORS
 import networkx as nx
-from networkx.algorithms.community import louvain_communities, modularity
+import orjson
+from networkx.algorithms.community import louvain_communities
 from sklearn.ensemble import IsolationForest
 import numpy as np
+from scipy import sparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import threading
 import traceback
 
+try:
+    from numba import njit
+except ImportError:  # optional: community stats fall back to NumPy
+    njit = None
+
 app = Flask(__name__)
 CORS(app)
 
+# NetworkX backends tried for Louvain before the built-in implementation, and those
+# that failed at runtime (not retried, so the failure is logged only once)
+LOUVAIN_BACKENDS = ("cugraph",)
+_failed_louvain_backends = set()
+
+# Cores for IsolationForest; gunicorn.conf.py sets this per worker to avoid oversubscription
+N_JOBS = int(os.environ.get("ML_N_JOBS", "-1"))
+
+# Fitted IsolationForest models keyed by a digest of their training features (LRU)
+MODEL_CACHE_SIZE = 8
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+# Raw PageRank vector from the previous snapshot: reused as-is when the directed
+# structure is unchanged, otherwise used to warm-start the next power iteration
+PAGERANK_WARM_START_COVERAGE = 0.9
+_last_pagerank = {"key": None, "id_to_idx": None, "x": None}
+_last_pagerank_lock = threading.Lock()
+
+# Response for the most recent snapshot, reused when the next one is identical
+_last_result = {"key": None, "response": None}
+_last_result_lock = threading.Lock()
+
+
+class GraphArrays:
+    """Integer-indexed CSR view of a graph snapshot.
+
+    Node ``i`` has id ``ids[i]`` (``id_to_idx`` maps back) and metadata
+    ``edit_counts[i]``, ``types[i]``, ``labels[i]``. ``srcs``/``tgts``/``weights``
+    hold each undirected edge once, in order of first appearance in the payload;
+    ``csr`` is the symmetric undirected adjacency (bipartite + coedit) and
+    ``csr_directed`` the bipartite adjacency in both directions, used for PageRank.
+    """
+
+    def __init__(self, ids, id_to_idx, edit_counts, types, labels, srcs, tgts, weights, csr, csr_directed):
+        self.ids = ids
+        self.id_to_idx = id_to_idx
+        self.edit_counts = edit_counts
+        self.types = types
+        self.labels = labels
+        self.srcs = srcs
+        self.tgts = tgts
+        self.weights = weights
+        self.csr = csr
+        self.csr_directed = csr_directed
+
+    @property
+    def n(self):
+        return len(self.ids)
+
+    def pagerank_digest(self):
+        """BLAKE2b digest of the node ids and the directed adjacency PageRank runs on."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(np.array([self.n, self.csr_directed.nnz]).tobytes())
+        for arr in (self.csr_directed.indptr, self.csr_directed.indices, self.csr_directed.data):
+            h.update(arr.tobytes())
+        h.update(orjson.dumps(self.ids.tolist()))
+        return h.digest()
+
+    def digest(self):
+        """BLAKE2b digest of everything the analysis reads from this snapshot."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(np.array([self.n, self.srcs.size, self.csr_directed.nnz]).tobytes())
+        for arr in (self.srcs, self.tgts, self.weights, self.edit_counts,
+                    self.csr_directed.indptr, self.csr_directed.indices, self.csr_directed.data):
+            h.update(arr.tobytes())
+        for values in (self.ids, self.types, self.labels):
+            h.update(orjson.dumps(values.tolist()))
+        return h.digest()
 
-def build_graphs(nodes, edges):
-    """Build NetworkX graphs from the raw node/edge data."""
-    # Undirected graph for community detection (bipartite + coedit edges)
-    G_undirected = nx.Graph()
-    # Directed graph for PageRank (bipartite edges)
-    G_directed = nx.DiGraph()
 
+def build_graphs(nodes, edges):
+    """Build integer-indexed CSR adjacency and node metadata arrays from the raw node/edge data."""
     node_map = {}
+    ids = []
+    id_to_idx = {}
     for n in nodes:
         node_map[n["id"]] = n
-        G_undirected.add_node(n["id"], **n)
-        G_directed.add_node(n["id"], **n)
-
+        if n["id"] not in id_to_idx:
+            id_to_idx[n["id"]] = len(ids)
+            ids.append(n["id"])
+
+    # Undirected graph gets bipartite + coedit edges; directed graph gets bipartite only
+    srcs = np.empty(len(edges), np.int32)
+    tgts = np.empty(len(edges), np.int32)
+    weights = np.empty(len(edges), np.float64)
+    bipartite = np.empty(len(edges), np.bool_)
+    count = 0
     for e in edges:
-        src, tgt = e["source"], e["target"]
-        w = e.get("weight", 1)
         view = e.get("view", "bipartite")
-
-        # Undirected graph gets bipartite + coedit edges
-        if view in ("bipartite", "coedit"):
-            if G_undirected.has_edge(src, tgt):
-                G_undirected[src][tgt]["weight"] += w
-            else:
-                G_undirected.add_edge(src, tgt, weight=w)
-
-        # Directed graph gets bipartite edges (both directions for PageRank)
-        if view == "bipartite":
-            if not G_directed.has_edge(src, tgt):
-                G_directed.add_edge(src, tgt, weight=w)
-            if not G_directed.has_edge(tgt, src):
-                G_directed.add_edge(tgt, src, weight=w)
-
-    return G_undirected, G_directed, node_map
+        if view not in ("bipartite", "coedit"):
+            continue
+        for nid in (e["source"], e["target"]):
+            if nid not in id_to_idx:
+                id_to_idx[nid] = len(ids)
+                ids.append(nid)
+        srcs[count] = id_to_idx[e["source"]]
+        tgts[count] = id_to_idx[e["target"]]
+        weights[count] = e.get("weight", 1)
+        bipartite[count] = view == "bipartite"
+        count += 1
+    srcs, tgts, weights, bipartite = srcs[:count], tgts[:count], weights[:count], bipartite[:count]
+    n = len(ids)
+
+    # Node metadata, indexed like the CSR (edge-only nodes get defaults)
+    infos = [node_map.get(nid, {}) for nid in ids]
+    edit_counts = np.fromiter((info.get("editCount", 0) for info in infos), dtype=np.int64, count=n)
+    types = np.array([info.get("type", "unknown") for info in infos], dtype=object)
+    labels = np.array([info.get("label", nid) for info, nid in zip(infos, ids)], dtype=object)
+
+    # Merge duplicate undirected edges, summing their weights, and keep payload order
+    lo = np.minimum(srcs, tgts).astype(np.int64)
+    hi = np.maximum(srcs, tgts).astype(np.int64)
+    keys, first, inverse = np.unique(lo * n + hi, return_index=True, return_inverse=True)
+    u_weights = np.bincount(inverse, weights=weights, minlength=keys.size)
+    order = np.argsort(first)
+    keys, u_weights = keys[order], u_weights[order]
+    u_srcs = (keys // n).astype(np.int32)
+    u_tgts = (keys % n).astype(np.int32)
+    off_diag = u_srcs != u_tgts
+    csr = sparse.coo_array(
+        (
+            np.concatenate([u_weights, u_weights[off_diag]]),
+            (np.concatenate([u_srcs, u_tgts[off_diag]]), np.concatenate([u_tgts, u_srcs[off_diag]])),
+        ),
+        shape=(n, n),
+    ).tocsr()
+
+    # Bipartite edges in both directions for PageRank, keeping the first weight seen
+    d_srcs = np.column_stack([srcs[bipartite], tgts[bipartite]]).ravel().astype(np.int64)
+    d_tgts = np.column_stack([tgts[bipartite], srcs[bipartite]]).ravel().astype(np.int64)
+    d_weights = np.repeat(weights[bipartite], 2)
+    keys, first = np.unique(d_srcs * n + d_tgts, return_index=True)
+    csr_directed = sparse.coo_array((d_weights[first], (keys // n, keys % n)), shape=(n, n)).tocsr()
+
+    ids = np.array(ids, dtype=object)
+    return GraphArrays(ids, id_to_idx, edit_counts, types, labels, u_srcs, u_tgts, u_weights, csr, csr_directed)
+
+
+def run_louvain(G):
+    """Louvain dispatched to the first NetworkX backend that implements it and works."""
+    for backend in LOUVAIN_BACKENDS:
+        if backend not in louvain_communities.backends or backend in _failed_louvain_backends:
+            continue
+        try:
+            return louvain_communities(G, weight="weight", resolution=1.0, seed=42, backend=backend)
+        except Exception:
+            # e.g. nx-cugraph installed without a usable GPU: log once, then stop trying it
+            print(f"[ml] Louvain backend {backend!r} failed, disabling it")
+            traceback.print_exc()
+            _failed_louvain_backends.add(backend)
+    return louvain_communities(G, weight="weight", resolution=1.0, seed=42)
+
+
+def louvain_graph(graph, kept):
+    """NetworkX graph of the kept (non-isolated) nodes with payload-ordered adjacency.
+
+    Seeded Louvain depends on neighbor iteration order, so nodes are added in id order
+    and each node's neighbors in the order its edges first appeared in the payload,
+    matching a graph built edge by edge from the raw snapshot.
+    """
+    off_diag = graph.srcs != graph.tgts
+    edge_order = np.arange(graph.srcs.size)
+    half_u = np.concatenate([graph.srcs, graph.tgts[off_diag]])
+    half_v = np.concatenate([graph.tgts, graph.srcs[off_diag]])
+    half_w = np.concatenate([graph.weights, graph.weights[off_diag]])
+    order = np.lexsort((np.concatenate([edge_order, edge_order[off_diag]]), half_u))
+
+    G = nx.Graph()
+    G.add_nodes_from(graph.ids[kept].tolist())
+    G.add_edges_from(
+        (u, v, {"weight": w})
+        for u, v, w in zip(
+            graph.ids[half_u[order]].tolist(),
+            graph.ids[half_v[order]].tolist(),
+            half_w[order].tolist(),
+        )
+    )
+    return G
 
 
-def detect_communities(G):
+def detect_communities(graph):
     """Community detection using NetworkX Louvain algorithm."""
-    if G.number_of_nodes() < 2:
-        return {n: 0 for n in G.nodes()}
+    if graph.n < 2:
+        return {nid: 0 for nid in graph.ids}
 
     # Remove isolated nodes for Louvain (add them back after)
-    connected_nodes = [n for n in G.nodes() if G.degree(n) > 0]
-    if len(connected_nodes) < 2:
-        return {n: 0 for n in G.nodes()}
+    kept = np.flatnonzero(np.diff(graph.csr.indptr) > 0)
+    if kept.size < 2:
+        return {nid: 0 for nid in graph.ids}
 
-    G_connected = G.subgraph(connected_nodes).copy()
+    G_connected = louvain_graph(graph, kept)
 
     try:
-        communities_list = louvain_communities(G_connected, weight="weight", resolution=1.0, seed=42)
+        communities_list = run_louvain(G_connected)
     except Exception:
         # Fallback: each node in its own community
-        return {n: i for i, n in enumerate(G.nodes())}
+        return {nid: i for i, nid in enumerate(graph.ids)}
 
     # Build node -> community mapping
     communities = {}
@@ -82,205 +252,342 @@ def detect_communities(G):
 
     # Assign isolated nodes to a catch-all community
     next_id = len(communities_list)
-    for n in G.nodes():
-        if n not in communities:
-            communities[n] = next_id
+    for nid in graph.ids:
+        if nid not in communities:
+            communities[nid] = next_id
 
     return communities
 
 
-def compute_pagerank(G_directed):
-    """PageRank using NetworkX eigenvector-based implementation."""
-    if G_directed.number_of_nodes() == 0:
+def pagerank_start_vector(graph):
+    """Initial PageRank vector seeded from the previous snapshot, or uniform.
+
+    Nodes carried over keep their previous score and new nodes start at 1/n. The seed
+    is used only if enough of the current nodes were in the previous snapshot.
+    """
+    n = graph.n
+    with _last_pagerank_lock:
+        prev_idx, prev_x = _last_pagerank["id_to_idx"], _last_pagerank["x"]
+    if prev_idx is None:
+        return np.full(n, 1.0 / n)
+
+    idx = np.fromiter((prev_idx.get(nid, -1) for nid in graph.ids), dtype=np.int64, count=n)
+    found = idx >= 0
+    if found.sum() < PAGERANK_WARM_START_COVERAGE * n:
+        return np.full(n, 1.0 / n)
+
+    x = np.full(n, 1.0 / n)
+    x[found] = prev_x[idx[found]]
+    x /= x.sum()
+    return x
+
+
+def pagerank_power_iteration(graph, alpha, max_iter, tol):
+    """Raw PageRank vector (sums to 1) by sparse power iteration, or None if it fails to converge."""
+    n = graph.n
+    A = graph.csr_directed
+
+    # Row-normalize by out-weight; rows with no out-weight are dangling
+    S = np.asarray(A.sum(axis=1)).ravel()
+    dangling = S == 0
+    inv_S = np.zeros(n)
+    np.divide(1.0, S, out=inv_S, where=~dangling)
+    A = sparse.diags(inv_S).dot(A).tocsr()
+    A_T = A.T.tocsr()
+
+    # Power iteration with uniform teleport and dangling redistribution
+    x = pagerank_start_vector(graph)
+    for _ in range(max_iter):
+        x_last = x
+        x = alpha * (A_T @ x_last) + (alpha * x_last[dangling].sum() + 1 - alpha) / n
+        if np.abs(x - x_last).sum() < n * tol:
+            return x
+    return None
+
+
+def compute_pagerank(graph, alpha=0.85, max_iter=100, tol=1e-06):
+    """PageRank via SciPy sparse power iteration on the CSR transition matrix."""
+    if graph.n == 0:
         return {}
 
-    try:
-        pr = nx.pagerank(G_directed, alpha=0.85, max_iter=100, tol=1e-06, weight="weight")
-    except Exception:
-        return {n: 0 for n in G_directed.nodes()}
+    # Same ids and directed edges as last time: reuse the converged vector unchanged so
+    # repeated structures give identical scores (and a stable anomaly feature matrix)
+    key = graph.pagerank_digest()
+    with _last_pagerank_lock:
+        x = _last_pagerank["x"].copy() if _last_pagerank["key"] == key else None
 
-    # Normalize to 0-1
-    max_pr = max(pr.values()) if pr else 1
-    if max_pr > 0:
-        pr = {k: v / max_pr for k, v in pr.items()}
+    if x is None:
+        x = pagerank_power_iteration(graph, alpha, max_iter, tol)
+        if x is None:
+            return {nid: 0 for nid in graph.ids}
+        with _last_pagerank_lock:
+            _last_pagerank["key"] = key
+            _last_pagerank["id_to_idx"] = graph.id_to_idx
+            _last_pagerank["x"] = x.copy()
 
-    return pr
+    # Normalize to 0-1 in place (already normalized if the top score is exactly 1)
+    max_pr = x.max()
+    if max_pr > 0 and max_pr != 1.0:
+        x /= max_pr
 
+    return dict(zip(graph.ids, x.tolist()))
 
-def detect_hubs(G, node_map):
-    """Hub detection using NetworkX degree centrality."""
-    if G.number_of_nodes() == 0:
+
+def detect_hubs(graph):
+    """Hub detection by node degree read off the CSR index pointer."""
+    if graph.n == 0:
         return []
 
-    centrality = nx.degree_centrality(G)
+    degrees = np.diff(graph.csr.indptr)
 
-    # Sort by centrality descending
-    sorted_nodes = sorted(centrality.items(), key=lambda x: x[1], reverse=True)
+    # Top 10% are hubs (minimum 1): everything above the k-th largest degree, then
+    # the earliest nodes tied at it, so ties resolve like a stable sort (all O(N))
+    hub_count = max(1, int(np.ceil(graph.n * 0.1)))
+    threshold = np.partition(degrees, graph.n - hub_count)[graph.n - hub_count]
+    above = np.flatnonzero(degrees > threshold)
+    tied = np.flatnonzero(degrees == threshold)[:hub_count - above.size]
+    top = np.concatenate([above, tied])
+    top = top[np.argsort(-degrees[top], kind="stable")]
 
-    # Top 10% are hubs (minimum 1)
-    hub_count = max(1, int(np.ceil(len(sorted_nodes) * 0.1)))
     hubs = []
-    for node_id, _ in sorted_nodes[:hub_count]:
-        degree = G.degree(node_id)
-        label = node_map.get(node_id, {}).get("label", node_id)
-        hubs.append({"id": node_id, "label": label, "degree": degree})
+    for i in top:
+        hubs.append({"id": graph.ids[i], "label": graph.labels[i], "degree": degrees[i]})
 
     return hubs
 
 
-def detect_anomalies(G, node_map, pagerank):
+def weighted_clustering(A):
+    """Weighted clustering coefficient per node (NetworkX definition) via sparse matmul.
+
+    Edge weights are scaled by the max weight and cube-rooted, so the diagonal of
+    ``W @ W @ W`` is each node's weighted triangle sum over ordered neighbor pairs.
+    """
+    W = A.tocsr(copy=True)
+    W.setdiag(0)
+    W.eliminate_zeros()
+    n = W.shape[0]
+    if W.nnz == 0:
+        return np.zeros(n)
+
+    W.data = np.cbrt(W.data / W.data.max())
+    triangles = np.asarray(W.multiply(W @ W).sum(axis=1)).ravel()
+    deg = np.diff(W.indptr)
+    clustering = np.zeros(n)
+    np.divide(triangles, deg * (deg - 1.0), out=clustering, where=deg > 1)
+    return clustering
+
+
+def fit_isolation_forest(X):
+    """Fit IsolationForest on X, reusing a cached model when X was seen recently."""
+    key = hashlib.blake2b(X.tobytes(), digest_size=16).digest()
+    with _model_cache_lock:
+        clf = _model_cache.get(key)
+        if clf is not None:
+            _model_cache.move_to_end(key)
+            return clf
+
+    # Small snapshots reach stable scores with fewer trees; each tree sees at most 256 samples
+    n_estimators = int(np.clip(len(X) // 20, 20, 100))
+    contamination = min(0.1, max(2 / len(X), 0.01))
+    clf = IsolationForest(
+        n_estimators=n_estimators,
+        max_samples=min(256, len(X)),
+        contamination=contamination,
+        random_state=42,
+        n_jobs=N_JOBS,
+    )
+    clf.fit(X)
+
+    with _model_cache_lock:
+        _model_cache[key] = clf
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return clf
+
+
+def detect_anomalies(graph, pagerank):
     """Anomaly detection using scikit-learn IsolationForest."""
     anomalies = {}
 
-    if G.number_of_nodes() < 5:
+    if graph.n < 5:
         return anomalies
 
     # Extract features per node: editCount, degree, clustering coefficient, PageRank
-    node_ids = list(G.nodes())
-    clustering = nx.clustering(G, weight="weight")
-
-    features = []
-    valid_node_ids = []
-    for nid in node_ids:
-        info = node_map.get(nid, {})
-        edit_count = info.get("editCount", 0)
-        degree = G.degree(nid)
-        clust = clustering.get(nid, 0)
-        pr_score = pagerank.get(nid, 0)
-        features.append([edit_count, degree, clust, pr_score])
-        valid_node_ids.append(nid)
-
-    if len(features) < 5:
+    degrees = np.diff(graph.csr.indptr)
+    X = np.empty((graph.n, 4), dtype=np.float64)
+    X[:, 0] = graph.edit_counts
+    X[:, 1] = degrees
+    X[:, 2] = weighted_clustering(graph.csr)
+    X[:, 3] = np.fromiter((pagerank.get(nid, 0) for nid in graph.ids), dtype=np.float64, count=graph.n)
+
+    if X.shape[0] < 5:
         return anomalies
 
-    X = np.array(features, dtype=np.float64)
-
     # IsolationForest: unsupervised anomaly detection
-    contamination = min(0.1, max(2 / len(X), 0.01))
-    clf = IsolationForest(
-        n_estimators=100,
-        contamination=contamination,
-        random_state=42,
-    )
-    clf.fit(X)
-    predictions = clf.predict(X)        # -1 = anomaly, 1 = normal
-    scores = clf.decision_function(X)    # lower = more anomalous
-
-    for i, nid in enumerate(valid_node_ids):
-        if predictions[i] == -1:
-            info = node_map.get(nid, {})
-            label = info.get("label", nid)
-            node_type = info.get("type", "unknown")
-
-            # Determine anomaly type based on node characteristics
-            edit_count = info.get("editCount", 0)
-            degree = G.degree(nid)
-
-            if node_type == "editor" and edit_count > 5:
-                anomaly_type = "prolific_editor"
-                details = f"{label} edited {edit_count} articles (IsolationForest outlier)"
-            elif node_type == "article" and degree > 3:
-                anomaly_type = "coordinated_edit"
-                details = f"{label} has {degree} connections (IsolationForest outlier)"
-            else:
-                anomaly_type = "structural_outlier"
-                details = f"{label} flagged as structural outlier by IsolationForest"
-
-            # Convert decision function score to 0-1 anomaly score
-            # decision_function: negative = more anomalous
-            raw_score = -scores[i]
-            anomaly_score = float(min(max(raw_score, 0), 1))
-
-            anomalies[nid] = {
-                "type": anomaly_type,
-                "score": round(anomaly_score, 3),
-                "details": details,
-            }
+    clf = fit_isolation_forest(X)
+
+    # One pass over the trees: decision_function = score_samples - offset_
+    scores = clf.score_samples(X) - clf.offset_    # lower = more anomalous
+    predictions = np.where(scores < 0, -1, 1)      # -1 = anomaly, 1 = normal
+
+    # Only the flagged nodes need per-node Python work
+    mask = predictions == -1
+    anom_ids = graph.ids[mask]
+    anom_labels = graph.labels[mask]
+    edit_counts = graph.edit_counts[mask]
+    anom_degrees = degrees[mask]
+    node_types = graph.types[mask]
+
+    # Determine anomaly type based on node characteristics
+    is_prolific = (node_types == "editor") & (edit_counts > 5)
+    is_coordinated = ~is_prolific & (node_types == "article") & (anom_degrees > 3)
+
+    # Convert decision function score to 0-1 anomaly score
+    # decision_function: negative = more anomalous
+    anom_scores = np.clip(-scores[mask], 0, 1)
+
+    for j, (nid, label) in enumerate(zip(anom_ids, anom_labels)):
+        if is_prolific[j]:
+            anomaly_type = "prolific_editor"
+            details = f"{label} edited {edit_counts[j]} articles (IsolationForest outlier)"
+        elif is_coordinated[j]:
+            anomaly_type = "coordinated_edit"
+            details = f"{label} has {anom_degrees[j]} connections (IsolationForest outlier)"
+        else:
+            anomaly_type = "structural_outlier"
+            details = f"{label} flagged as structural outlier by IsolationForest"
+
+        anomalies[nid] = {
+            "type": anomaly_type,
+            "score": round(float(anom_scores[j]), 3),
+            "details": details,
+        }
 
     return anomalies
 
 
-def evaluate_communities(G, communities):
+def _community_stats_numpy(srcs, tgts, weights, comm, ncomm):
+    """Intra-community edge count and weight, community sizes and strengths."""
+    src_comm = comm[srcs]
+    tgt_comm = comm[tgts]
+    intra_mask = (src_comm == tgt_comm) & (src_comm >= 0)
+    sizes = np.bincount(comm[comm >= 0], minlength=ncomm)
+    strength = np.zeros(ncomm)
+    for edge_comm in (src_comm, tgt_comm):
+        ok = edge_comm >= 0
+        strength += np.bincount(edge_comm[ok], weights=weights[ok], minlength=ncomm)
+    return int(intra_mask.sum()), float(weights[intra_mask].sum()), sizes, strength
+
+
+def _community_stats_loop(srcs, tgts, weights, comm, ncomm):
+    """Same as _community_stats_numpy as one fused loop, for Numba to compile."""
+    intra = 0
+    intra_weight = 0.0
+    sizes = np.zeros(ncomm, np.int64)
+    strength = np.zeros(ncomm, np.float64)
+    for i in range(srcs.size):
+        cs = comm[srcs[i]]
+        ct = comm[tgts[i]]
+        w = weights[i]
+        if cs >= 0:
+            strength[cs] += w
+        if ct >= 0:
+            strength[ct] += w
+        if cs >= 0 and cs == ct:
+            intra += 1
+            intra_weight += w
+    for c in comm:
+        if c >= 0:
+            sizes[c] += 1
+    return intra, intra_weight, sizes, strength
+
+
+if njit is not None:
+    # Compile at import so the first request doesn't pay for it. No on-disk cache:
+    # Numba's cache is tied to the importing module name (server vs __main__).
+    community_stats = njit(_community_stats_loop)
+    community_stats(np.zeros(1, np.int32), np.zeros(1, np.int32), np.ones(1), np.zeros(1, np.int64), 1)
+else:
+    community_stats = _community_stats_numpy
+
+
+def evaluate_communities(graph, communities):
     """Evaluate community detection quality."""
-    if not communities or G.number_of_edges() == 0:
+    if not communities or graph.srcs.size == 0:
         return {"modularity": 0, "numCommunities": 0, "coverage": 0, "largestSize": 0, "medianSize": 0}
 
-    # Build partition as list of sets
-    comm_to_nodes = {}
+    # Community index per node (relabelled to 0..k-1)
+    comm = np.full(graph.n, -1, dtype=np.int64)
     for node, comm_id in communities.items():
-        if node in G.nodes():
-            comm_to_nodes.setdefault(comm_id, set()).add(node)
-    partition = list(comm_to_nodes.values())
-
-    if not partition:
+        idx = graph.id_to_idx.get(node)
+        if idx is not None:
+            comm[idx] = comm_id
+    assigned = comm >= 0
+    if not assigned.any():
         return {"modularity": 0, "numCommunities": 0, "coverage": 0, "largestSize": 0, "medianSize": 0}
+    _, comm[assigned] = np.unique(comm[assigned], return_inverse=True)
 
-    # Modularity using NetworkX
-    try:
-        mod = modularity(G, partition, weight="weight")
-    except Exception:
-        mod = 0
+    intra, intra_weight, sizes, comm_strength = community_stats(
+        graph.srcs, graph.tgts, graph.weights, comm, int(comm.max()) + 1
+    )
 
     # Coverage: fraction of edges within communities
-    intra = 0
-    total = G.number_of_edges()
-    node_to_comm = {}
-    for comm_id, nodes_set in enumerate(partition):
-        for n in nodes_set:
-            node_to_comm[n] = comm_id
-    for u, v in G.edges():
-        if node_to_comm.get(u) == node_to_comm.get(v):
-            intra += 1
+    total = graph.srcs.size
     coverage = round(intra / total, 3) if total > 0 else 0
 
-    # Size distribution
-    sizes = sorted([len(s) for s in partition], reverse=True)
+    # Modularity (NetworkX definition): sum_c L_c/m - (d_c/2m)^2 over weighted edges
+    m = graph.weights.sum()
+    if m > 0:
+        mod = intra_weight / m - ((comm_strength / (2 * m)) ** 2).sum()
+    else:
+        mod = 0
 
     return {
-        "modularity": round(mod, 4),
-        "numCommunities": len(partition),
+        "modularity": round(float(mod), 4),
+        "numCommunities": sizes.size,
         "coverage": coverage,
-        "largestSize": sizes[0] if sizes else 0,
-        "medianSize": int(np.median(sizes)) if sizes else 0,
+        "largestSize": sizes.max(),
+        "medianSize": int(np.median(sizes)),
     }
 
 
 def evaluate_pagerank(pagerank):
     """Evaluate PageRank distribution quality."""
-    values = list(pagerank.values())
-    n = len(values)
+    n = len(pagerank)
     if n == 0:
         return {"gini": 0, "entropy": 0, "top10pct": 0, "nodeCount": 0}
 
-    arr = np.array(sorted(values))
-    mean = arr.mean()
+    arr = np.fromiter(pagerank.values(), dtype=np.float64, count=n)
+    arr.sort()
+    total = arr.sum()
+    mean = total / n
 
     # Gini coefficient
     if mean > 0:
         index = np.arange(1, n + 1)
-        gini = float(np.sum((2 * index - n - 1) * arr) / (n * n * mean))
+        gini = ((2 * index - n - 1) * arr).sum() / (n * n * mean)
     else:
         gini = 0
 
     # Normalized Shannon entropy
-    total = arr.sum()
     if total > 0:
-        p = arr[arr > 0] / total
-        entropy = float(-np.sum(p * np.log2(p)))
+        p = arr[arr > 0]
+        p *= 1.0 / total
+        entropy = -(p * np.log2(p)).sum()
         max_entropy = np.log2(n) if n > 1 else 1
         entropy = entropy / max_entropy if max_entropy > 0 else 0
     else:
         entropy = 0
 
-    # Top 10% concentration
+    # Top 10% concentration (arr is already sorted, so the tail is the top)
     top10_count = max(1, int(np.ceil(n * 0.1)))
-    top10_sum = float(arr[-top10_count:].sum())
+    top10_sum = arr[-top10_count:].sum()
     top10pct = top10_sum / total if total > 0 else 0
 
     return {
-        "gini": round(gini, 4),
-        "entropy": round(entropy, 4),
-        "top10pct": round(top10pct, 3),
+        "gini": round(float(gini), 4),
+        "entropy": round(float(entropy), 4),
+        "top10pct": round(float(top10pct), 3),
         "nodeCount": n,
     }
 
@@ -293,8 +600,8 @@ def evaluate_hubs(hubs):
     degrees = [h["degree"] for h in hubs]
     max_degree = degrees[0]
     total_degree = sum(degrees)
-    mean_degree = round(total_degree / len(degrees), 1)
-    hub_concentration = round(max_degree / total_degree, 3) if total_degree > 0 else 0
+    mean_degree = round(float(total_degree / len(degrees)), 1)
+    hub_concentration = round(float(max_degree / total_degree), 3) if total_degree > 0 else 0
 
     return {
         "hubCount": len(hubs),
@@ -309,7 +616,7 @@ def evaluate_anomalies(anomalies):
     entries = list(anomalies.values())
     prolific = [a for a in entries if a["type"] == "prolific_editor"]
     coordinated = [a for a in entries if a["type"] == "coordinated_edit"]
-    avg_score = round(sum(a["score"] for a in entries) / len(entries), 3) if entries else 0
+    avg_score = round(float(sum(a["score"] for a in entries) / len(entries)), 3) if entries else 0
 
     return {
         "totalCount": len(entries),
@@ -319,16 +626,22 @@ def evaluate_anomalies(anomalies):
     }
 
 
+def json_response(payload, status=200):
+    """JSON response serialized with orjson (NumPy values and non-string keys handled)."""
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return app.response_class(body, status=status, mimetype="application/json")
+
+
 @app.route("/analyze", methods=["POST"])
 def analyze():
     """Main ML analysis endpoint."""
     try:
-        data = request.get_json()
+        data = orjson.loads(request.get_data())
         nodes = data.get("nodes", [])
         edges = data.get("edges", [])
 
         if len(nodes) < 3:
-            return jsonify({
+            return json_response({
                 "communities": {},
                 "pagerank": {},
                 "hubs": [],
@@ -341,43 +654,60 @@ def analyze():
                 },
             })
 
-        # Build graphs
-        G_undirected, G_directed, node_map = build_graphs(nodes, edges)
-
-        # Run ML algorithms
-        communities = detect_communities(G_undirected)
-        pagerank = compute_pagerank(G_directed)
-        hubs = detect_hubs(G_undirected, node_map)
-        anomalies = detect_anomalies(G_undirected, node_map, pagerank)
+        # Build CSR adjacency
+        graph = build_graphs(nodes, edges)
+
+        # Identical snapshot (structure and metadata): reuse the previous result
+        key = graph.digest()
+        with _last_result_lock:
+            if _last_result["key"] == key:
+                return json_response(_last_result["response"])
+
+        # Run ML algorithms: Louvain, PageRank and hubs are independent, anomalies need PageRank
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            communities_future = pool.submit(detect_communities, graph)
+            pagerank_future = pool.submit(compute_pagerank, graph)
+            hubs_future = pool.submit(detect_hubs, graph)
+            pagerank = pagerank_future.result()
+            anomalies_future = pool.submit(detect_anomalies, graph, pagerank)
+            communities = communities_future.result()
+            hubs = hubs_future.result()
+            anomalies = anomalies_future.result()
 
         # Evaluation metrics
         evaluation = {
-            "community": evaluate_communities(G_undirected, communities),
+            "community": evaluate_communities(graph, communities),
             "pagerank": evaluate_pagerank(pagerank),
             "hubs": evaluate_hubs(hubs),
             "anomaly": evaluate_anomalies(anomalies),
         }
 
-        return jsonify({
+        response = {
             "communities": communities,
             "pagerank": pagerank,
             "hubs": hubs,
             "anomalies": anomalies,
             "evaluation": evaluation,
-        })
+        }
+        with _last_result_lock:
+            _last_result["key"] = key
+            _last_result["response"] = response
+
+        return json_response(response)
 
     except Exception as e:
         traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, status=500)
 
 
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint."""
-    return jsonify({"status": "ok", "engine": "networkx+sklearn"})
+    return json_response({"status": "ok", "engine": "networkx+sklearn"})
 
 
 if __name__ == "__main__":
-    print("[ml] Python ML server starting on http://localhost:5001")
+    # Only reached with USE_DEV_SERVER set; otherwise gunicorn took over at the top
+    print("[ml] Python ML dev server starting on http://localhost:5001")
     print("[ml] Using NetworkX (Louvain, PageRank) + scikit-learn (IsolationForest)")
     app.run(host="0.0.0.0", port=5001, debug=False)
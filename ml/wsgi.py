@@ -0,0 +1,7 @@
+"""
+WSGI entry point for the ML server.
+
+Run from the ml/ directory:  gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from server import app